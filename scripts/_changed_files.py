@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+_changed_files.py - Reads the changed manifest list shared by the verifiers
+
+The security scan writes the files touched by a change to changed_files.txt.
+This module reads that list in one pass, drops duplicates and anything that
+is not a .potion manifest, and parses each remaining manifest once.
+"""
+
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+import yaml
+
+try:
+    from yaml import CSafeLoader
+except ImportError:
+    from yaml import SafeLoader as CSafeLoader
+
+
+def changed_manifest_paths(changed_files_path: str) -> List[Path]:
+    """Return the unique, existing .potion manifests listed in a changed files list"""
+    lines = Path(changed_files_path).read_text().splitlines()
+    unique_paths = dict.fromkeys(line.strip() for line in lines)
+    return [
+        Path(file_path)
+        for file_path in unique_paths
+        if file_path.endswith(".potion") and Path(file_path).is_file()
+    ]
+
+
+def iter_manifests(changed_files_path: str,
+                   on_error: Optional[Callable[[Path, Exception], None]] = None
+                   ) -> Iterator[Tuple[Path, dict]]:
+    """Yield (path, manifest) for each changed manifest
+
+    Manifests that cannot be read or are not a YAML mapping are skipped,
+    after being passed to on_error when one is given.
+    """
+    for manifest_path in changed_manifest_paths(changed_files_path):
+        try:
+            with open(manifest_path, "r") as mf:
+                manifest = yaml.load(mf, Loader=CSafeLoader)
+            if not isinstance(manifest, dict):
+                raise ValueError("Manifest is not a YAML mapping")
+        except Exception as e:
+            if on_error:
+                on_error(manifest_path, e)
+            continue
+
+        yield manifest_path, manifest
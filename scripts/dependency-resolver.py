@@ -6,73 +6,92 @@ This script validates plugin dependencies, detects circular dependencies,
 and resolves version conflicts in the plugin registry.
 """
 
+import functools
 import json
 import sys
 import re
 from pathlib import Path
-from typing import Dict, List, Set, Optional, Tuple
+from typing import Dict, Iterator, List, Set, Optional, Tuple
 from collections import defaultdict, deque
 import yaml
+from packaging.specifiers import SpecifierSet
+from packaging.version import InvalidVersion, Version
 
+try:
+    from yaml import CSafeLoader
+except ImportError:
+    from yaml import SafeLoader as CSafeLoader
 
-class VersionConstraint:
-    """Represents a version constraint (e.g., >=1.0.0, ~>1.2.0)"""
-    
-    def __init__(self, constraint: str):
-        self.constraint = constraint
-        self.operator, self.version = self._parse(constraint)
-    
-    def _parse(self, constraint: str) -> Tuple[str, str]:
-        """Parse version constraint into operator and version"""
-        match = re.match(r'^(>=|<=|>|<|~>|=|\^)(.+)$', constraint)
-        if not match:
-            raise ValueError(f"Invalid version constraint: {constraint}")
-        return match.group(1), match.group(2)
+_CONSTRAINT_RE = re.compile(r'^(>=|<=|>|<|~>|=|\^)(.+)$')
+_SEMVER_PRERELEASE_RE = re.compile(r'^(v?\d+(?:\.\d+)*)-([0-9A-Za-z.-]+)$')
+
+# Pre-release forms with a lossless PEP 440 equivalent: an alpha/beta/rc label
+# with up to two numbers (`rc.1`, `rc1.2`), or any other word with at most one
+# number (`nightly.5`, `SNAPSHOT`), or a bare number (`1`)
+_LABELLED_PRERELEASE_RE = re.compile(
+    r'^(alpha|beta|preview|pre|rc|a|b|c)(?:[.-]?(0|[1-9]\d*)(?:\.(0|[1-9]\d*))?)?$', re.IGNORECASE
+)
+_DEV_PRERELEASE_RE = re.compile(r'^(?:[A-Za-z][A-Za-z-]*(?:\.(0|[1-9]\d*))?|(0|[1-9]\d*))$')
+
+
+def _to_pep440(version: str) -> str:
+    """Rewrite a semver version into a PEP 440 string with the same precedence
     
-    def satisfies(self, version: str) -> bool:
-        """Check if a version satisfies this constraint"""
-        # Normalize versions for comparison
-        v1_parts = self._parse_version(self.version)
-        v2_parts = self._parse_version(version)
-        
-        if self.operator == '=':
-            return self.version == version
-        elif self.operator == '>=':
-            return self._compare_versions(v2_parts, v1_parts) >= 0
-        elif self.operator == '<=':
-            return self._compare_versions(v2_parts, v1_parts) <= 0
-        elif self.operator == '>':
-            return self._compare_versions(v2_parts, v1_parts) > 0
-        elif self.operator == '<':
-            return self._compare_versions(v2_parts, v1_parts) < 0
-        elif self.operator == '~>':
-            # Pessimistic operator: ~>1.2.3 means >=1.2.3 and <1.3.0
-            return (self._compare_versions(v2_parts, v1_parts) >= 0 and
-                    self._compare_versions(v2_parts, (v1_parts[0], v1_parts[1] + 1, 0)) < 0)
-        elif self.operator == '^':
-            # Caret operator: ^1.2.3 means >=1.2.3 and <2.0.0
-            return (self._compare_versions(v2_parts, v1_parts) >= 0 and
-                    self._compare_versions(v2_parts, (v1_parts[0] + 1, 0, 0)) < 0)
-        return False
+    Build metadata is dropped. Semver pre-releases become PEP 440 pre-releases:
+    alpha/beta/rc labels map onto a/b/rc (a second number becomes a post
+    segment, so `rc.1` < `rc.1.2`), and any other label (`-nightly.5`,
+    `-SNAPSHOT`, `-1`) becomes a development release numbered by its numeric
+    identifier, so every pre-release sorts before its release. Pre-releases
+    that cannot be mapped without merging distinct versions raise
+    InvalidVersion.
+    """
+    version = version.split('+', 1)[0]
+    match = _SEMVER_PRERELEASE_RE.match(version)
+    if not match:
+        return version
+    release, prerelease = match.group(1), match.group(2)
     
-    def _parse_version(self, version: str) -> Tuple[int, int, int]:
-        """Parse semantic version into (major, minor, patch)"""
-        # Remove pre-release and build metadata
-        version = re.sub(r'[-+].*$', '', version)
-        parts = version.split('.')
-        return (
-            int(parts[0]) if len(parts) > 0 else 0,
-            int(parts[1]) if len(parts) > 1 else 0,
-            int(parts[2]) if len(parts) > 2 else 0
-        )
+    labelled = _LABELLED_PRERELEASE_RE.match(prerelease)
+    if labelled:
+        label, number, post = labelled.groups()
+        return f'{release}{label}{number or 0}' + (f'.post{post}' if post else '')
+    dev = _DEV_PRERELEASE_RE.match(prerelease)
+    if dev:
+        return f'{release}.dev{dev.group(1) or dev.group(2) or 0}'
+    raise InvalidVersion(f"Unsupported pre-release: '{version}'")
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_version(version: str) -> Version:
+    """Parse a semver version with packaging's PEP 440 parser"""
+    return Version(_to_pep440(version))
+
+
+def _translate_constraint(constraint: str) -> str:
+    """Translate a registry version constraint into a PEP 440 specifier"""
+    match = _CONSTRAINT_RE.match(constraint)
+    if not match:
+        raise ValueError(f"Invalid version constraint: {constraint}")
+    operator, version = match.group(1), match.group(2)
+    version = _to_pep440(version)
     
-    def _compare_versions(self, v1: Tuple[int, int, int], v2: Tuple[int, int, int]) -> int:
-        """Compare two version tuples. Returns -1, 0, or 1"""
-        if v1 < v2:
-            return -1
-        elif v1 > v2:
-            return 1
-        return 0
+    if operator == '=':
+        return f'=={version}'
+    if operator == '~>':
+        # Pessimistic operator: ~>1.2.3 means >=1.2.3 and <1.3.0
+        major, minor = (_parse_version(version).release + (0,))[:2]
+        return f'>={version},<{major}.{minor + 1}.0'
+    if operator == '^':
+        # Caret operator: ^1.2.3 means >=1.2.3 and <2.0.0
+        major = _parse_version(version).major
+        return f'>={version},<{major + 1}.0.0'
+    return f'{operator}{version}'
+
+
+@functools.lru_cache(maxsize=2048)
+def _make_specifier(constraint: str) -> SpecifierSet:
+    """Build a SpecifierSet for a registry constraint, reusing repeated specs"""
+    return SpecifierSet(_translate_constraint(constraint))
 
 
 class DependencyResolver:
@@ -82,7 +101,8 @@ class DependencyResolver:
         self.plugins_dir = plugins_dir
         self.plugins: Dict[str, dict] = {}
         self.dependency_graph: Dict[str, Set[str]] = defaultdict(set)
-        self.reverse_graph: Dict[str, Set[str]] = defaultdict(set)
+        self._plugin_version: Dict[str, str] = {}
+        self._total_dep_count = 0
     
     def load_plugins(self):
         """Load all plugin manifests from the plugins directory"""
@@ -92,10 +112,11 @@ class DependencyResolver:
         for manifest_file in self.plugins_dir.glob('*.potion'):
             try:
                 with open(manifest_file, 'r') as f:
-                    manifest = yaml.safe_load(f)
+                    manifest = yaml.load(f, Loader=CSafeLoader)
                     name = manifest.get('name')
                     if name:
                         self.plugins[name] = manifest
+                        self._plugin_version[name] = str(manifest.get('version', '0.0.0'))
             except Exception as e:
                 print(f"Warning: Failed to load {manifest_file}: {e}", file=sys.stderr)
     
@@ -106,38 +127,134 @@ class DependencyResolver:
             for dep in dependencies:
                 dep_name = dep.get('name')
                 if dep_name:
-                    self.dependency_graph[name].add(dep_name)
-                    self.reverse_graph[dep_name].add(name)
+                    deps = self.dependency_graph[name]
+                    if dep_name not in deps:
+                        deps.add(dep_name)
+                        self._total_dep_count += 1
     
-    def detect_circular_dependencies(self) -> List[List[str]]:
-        """Detect circular dependencies using DFS"""
-        cycles = []
-        visited = set()
-        rec_stack = set()
-        path = []
-        
-        def dfs(node: str):
-            visited.add(node)
-            rec_stack.add(node)
-            path.append(node)
-            
-            for neighbor in self.dependency_graph.get(node, set()):
-                if neighbor not in visited:
-                    dfs(neighbor)
-                elif neighbor in rec_stack:
-                    # Found a cycle
-                    cycle_start = path.index(neighbor)
-                    cycle = path[cycle_start:] + [neighbor]
-                    cycles.append(cycle)
+    def circular_components(self) -> List[List[str]]:
+        """Find groups of plugins that depend on each other using Tarjan's SCC algorithm
+        
+        Returns each strongly connected component that contains a cycle, with
+        the first plugin visited in that component listed first.
+        """
+        components = []
+        indices: Dict[str, int] = {}
+        lowlinks: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        scc_stack: List[str] = []
+        
+        def enter(node: str) -> Tuple[str, Iterator[str]]:
+            indices[node] = lowlinks[node] = len(indices)
+            scc_stack.append(node)
+            on_stack.add(node)
+            return node, iter(self.dependency_graph.get(node, ()))
+        
+        for root in self.plugins.keys():
+            if root in indices:
+                continue
             
-            rec_stack.remove(node)
-            path.pop()
+            # Explicit stack of (node, remaining neighbors) frames
+            stack = [enter(root)]
+            while stack:
+                node, neighbors = stack[-1]
+                neighbor = next(neighbors, None)
+                
+                if neighbor is not None:
+                    if neighbor not in indices:
+                        stack.append(enter(neighbor))
+                    elif neighbor in on_stack:
+                        lowlinks[node] = min(lowlinks[node], indices[neighbor])
+                    continue
+                
+                stack.pop()
+                if stack:
+                    parent = stack[-1][0]
+                    lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+                
+                if lowlinks[node] != indices[node]:
+                    continue
+                
+                # node is the root of a strongly connected component
+                component: List[str] = []
+                while True:
+                    member = scc_stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                component.reverse()
+                
+                if len(component) > 1 or node in self.dependency_graph.get(node, ()):
+                    components.append(component)
+        
+        return components
+    
+    def _cycle_path(self, component: List[str]) -> List[str]:
+        """Return the shortest dependency path from the component's first plugin back to itself"""
+        start = component[0]
+        members = set(component)
+        parents: Dict[str, str] = {}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            for dep_name in sorted(self.dependency_graph.get(node, ())):
+                if dep_name == start:
+                    path = [node]
+                    while path[-1] != start:
+                        path.append(parents[path[-1]])
+                    return path[::-1] + [start]
+                if dep_name in members and dep_name not in parents:
+                    parents[dep_name] = node
+                    queue.append(dep_name)
+        
+        return [start, start]
+    
+    def detect_circular_dependencies(self) -> List[List[str]]:
+        """Detect circular dependencies
+        
+        Each group of mutually dependent plugins is reported once, as a cycle
+        of real dependency edges that starts and ends at the same plugin.
+        """
+        return [self._cycle_path(component) for component in self.circular_components()]
+    
+    def topological_order(self, components: Optional[List[List[str]]] = None) -> List[str]:
+        """Order plugins so that each plugin comes after its dependencies
         
-        for node in self.plugins.keys():
-            if node not in visited:
-                dfs(node)
+        Uses Kahn's algorithm. Dependencies outside the registry are ignored,
+        and edges inside a circular dependency are not waited on, so plugins
+        in a cycle are placed once their other dependencies are ordered.
+        """
+        if components is None:
+            components = self.circular_components()
         
-        return cycles
+        component: Dict[str, int] = {}
+        for i, members in enumerate(components):
+            for member in members:
+                component[member] = i
+        
+        in_degree = {name: 0 for name in self.plugins}
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for name in self.plugins:
+            for dep_name in self.dependency_graph.get(name, ()):
+                if dep_name not in self.plugins:
+                    continue
+                if name in component and component.get(dep_name) == component[name]:
+                    continue
+                in_degree[name] += 1
+                dependents[dep_name].append(name)
+        
+        queue = deque(name for name, degree in in_degree.items() if degree == 0)
+        order = []
+        while queue:
+            name = queue.popleft()
+            order.append(name)
+            for dependent in dependents[name]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    queue.append(dependent)
+        
+        return order
     
     def validate_dependencies(self, manifest: dict) -> Tuple[bool, List[str]]:
         """Validate dependencies for a single plugin manifest"""
@@ -160,15 +277,23 @@ class DependencyResolver:
             dep_version = dep.get('version')
             if dep_version:
                 try:
-                    constraint = VersionConstraint(dep_version)
-                    plugin_version = self.plugins[dep_name].get('version', '0.0.0')
-                    if not constraint.satisfies(plugin_version):
-                        errors.append(
-                            f"Dependency '{dep_name}' version '{plugin_version}' "
-                            f"does not satisfy constraint '{dep_version}'"
-                        )
+                    specifier = _make_specifier(dep_version)
                 except ValueError as e:
                     errors.append(f"Invalid version constraint for '{dep_name}': {e}")
+                    continue
+                
+                plugin_version = self._plugin_version.get(dep_name, '0.0.0')
+                try:
+                    parsed_version = _parse_version(plugin_version)
+                except ValueError:
+                    errors.append(f"Dependency '{dep_name}' has invalid version '{plugin_version}'")
+                    continue
+                
+                if not specifier.contains(parsed_version, prereleases=True):
+                    errors.append(
+                        f"Dependency '{dep_name}' version '{plugin_version}' "
+                        f"does not satisfy constraint '{dep_version}'"
+                    )
         
         return len(errors) == 0, errors
     
@@ -177,15 +302,23 @@ class DependencyResolver:
         errors = []
         
         # Detect circular dependencies
-        cycles = self.detect_circular_dependencies()
-        if cycles:
-            for cycle in cycles:
-                errors.append(f"Circular dependency detected: {' -> '.join(cycle)}")
+        components = self.circular_components()
+        for component in components:
+            cycle = self._cycle_path(component)
+            errors.append(f"Circular dependency detected: {' -> '.join(cycle)}")
         
-        # Validate each plugin's dependencies
-        for name, manifest in self.plugins.items():
-            valid, plugin_errors = self.validate_dependencies(manifest)
-            if not valid:
+        # Validate plugins in dependency order so failures cascade to dependents
+        cycle_of = {member: members for members in map(set, components) for member in members}
+        broken: Set[str] = set(cycle_of)
+        for name in self.topological_order(components):
+            valid, plugin_errors = self.validate_dependencies(self.plugins[name])
+            
+            for dep_name in sorted(self.dependency_graph.get(name, ())):
+                if dep_name in broken and dep_name not in cycle_of.get(name, ()):
+                    plugin_errors.append(f"Dependency '{dep_name}' has unresolved dependencies")
+            
+            if plugin_errors:
+                broken.add(name)
                 errors.extend([f"[{name}] {e}" for e in plugin_errors])
         
         return len(errors) == 0, errors
@@ -208,7 +341,7 @@ def main():
         # Validate single manifest
         try:
             with open(manifest_file, 'r') as f:
-                manifest = yaml.safe_load(f)
+                manifest = yaml.load(f, Loader=CSafeLoader)
             
             valid, errors = resolver.validate_dependencies(manifest)
             if not valid:
@@ -232,7 +365,7 @@ def main():
         
         print("✓ All dependencies resolved successfully")
         print(f"  Total plugins: {len(resolver.plugins)}")
-        print(f"  Total dependencies: {sum(len(deps) for deps in resolver.dependency_graph.values())}")
+        print(f"  Total dependencies: {resolver._total_dep_count}")
 
 
 if __name__ == "__main__":
@@ -6,25 +6,113 @@ This script scans the plugins directory, reads all .potion manifest files,
 and generates a searchable index.json file for the registry.
 """
 
-import json
+import hashlib
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
+import orjson
 import yaml
 
+try:
+    from yaml import CSafeLoader
+except ImportError:
+    from yaml import SafeLoader as CSafeLoader
+
+# Bump when the indexed plugin fields change to invalidate cached entries
+INDEX_CACHE_VERSION = 1
+
 
 def load_manifest(file_path: Path) -> Dict:
     """Load and parse a manifest file"""
     try:
         with open(file_path, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=CSafeLoader)
     except Exception as e:
         print(f"Warning: Failed to load {file_path}: {e}", file=sys.stderr)
         return None
 
 
+def extract_plugin_data(manifest: Dict) -> Dict:
+    """Extract the indexed fields from a manifest"""
+    plugin_data = {
+        "name": manifest.get("name"),
+        "version": manifest.get("version"),
+        "description": manifest.get("description"),
+        "author": manifest.get("author"),
+        "repository": manifest.get("repository"),
+        "homepage": manifest.get("homepage"),
+        "license": manifest.get("license"),
+        "tags": manifest.get("tags", []),
+        "verified": manifest.get("verified", False),
+        "potionfile_path": manifest.get("potionfile_path", "Potionfile"),
+        "min_potions_version": manifest.get("min_potions_version"),
+        "max_potions_version": manifest.get("max_potions_version"),
+        "dependencies": manifest.get("dependencies", []),
+        "install": manifest.get("install", {"type": "git", "path": "/"}),
+    }
+    
+    # Remove None values
+    return {k: v for k, v in plugin_data.items() if v is not None}
+
+
+def load_index_cache(cache_file: Path, index_file: Path) -> Tuple[Dict, Dict]:
+    """Load manifest stats from the cache and plugin data from the previous index
+    
+    Returns (files, plugins): cached {filename: {mtime_ns, size, name}} entries
+    and previously indexed plugins keyed by name. Both are empty when either
+    file is missing, unreadable, or written by a different cache version.
+    """
+    try:
+        cache = orjson.loads(cache_file.read_bytes())
+        index = orjson.loads(index_file.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return {}, {}
+    
+    if not isinstance(cache, dict) or cache.get("version") != INDEX_CACHE_VERSION:
+        return {}, {}
+    
+    files = cache.get("files")
+    indexed = index.get("plugins") if isinstance(index, dict) else None
+    if (not isinstance(files, dict) or not all(isinstance(entry, dict) for entry in files.values())
+            or not isinstance(indexed, list) or not all(isinstance(plugin, dict) for plugin in indexed)):
+        return {}, {}
+    
+    # Names shared by several plugins cannot be matched back to one manifest
+    plugins = {}
+    duplicates = set()
+    for plugin in indexed:
+        name = plugin.get("name")
+        if not isinstance(name, str):
+            continue
+        if name in plugins:
+            duplicates.add(name)
+        plugins[name] = plugin
+    for name in duplicates:
+        del plugins[name]
+    
+    return files, plugins
+
+
+def save_index_cache(cache_file: Path, files: Dict):
+    """Persist manifest stats for the next run"""
+    try:
+        cache_file.write_bytes(orjson.dumps({"version": INDEX_CACHE_VERSION, "files": files}))
+    except OSError as e:
+        print(f"Warning: Failed to write {cache_file}: {e}", file=sys.stderr)
+
+
+def read_content_hash(index_file: Path) -> Optional[str]:
+    """Return the content hash recorded in an existing index, if any"""
+    try:
+        index = orjson.loads(index_file.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+    return index.get("content_hash") if isinstance(index, dict) else None
+
+
 def generate_index(plugins_dir: Path, output_file: Path) -> bool:
     """Generate index.json from all plugin manifests"""
     if not plugins_dir.exists():
@@ -40,51 +128,75 @@ def generate_index(plugins_dir: Path, output_file: Path) -> bool:
     if not manifest_files:
         print("Warning: No manifest files found in plugins directory", file=sys.stderr)
     
+    # Reuse plugin data from the previous index for manifests that did not change
+    cache_file = output_file.with_name(f".{output_file.stem}-cache.json")
+    cached_files, previous_plugins = load_index_cache(cache_file, output_file)
+    
+    file_stats = {}
+    plugin_data_by_file = {}
+    stale_files = []
     for manifest_file in manifest_files:
-        manifest = load_manifest(manifest_file)
-        if not manifest:
-            continue
-        
-        # Extract plugin data
-        plugin_data = {
-            "name": manifest.get("name"),
-            "version": manifest.get("version"),
-            "description": manifest.get("description"),
-            "author": manifest.get("author"),
-            "repository": manifest.get("repository"),
-            "homepage": manifest.get("homepage"),
-            "license": manifest.get("license"),
-            "tags": manifest.get("tags", []),
-            "verified": manifest.get("verified", False),
-            "potionfile_path": manifest.get("potionfile_path", "Potionfile"),
-            "min_potions_version": manifest.get("min_potions_version"),
-            "max_potions_version": manifest.get("max_potions_version"),
-            "dependencies": manifest.get("dependencies", []),
-            "install": manifest.get("install", {"type": "git", "path": "/"}),
-        }
+        stat = manifest_file.stat()
+        file_stats[manifest_file.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
         
-        # Remove None values
-        plugin_data = {k: v for k, v in plugin_data.items() if v is not None}
+        entry = cached_files.get(manifest_file.name)
+        if (entry and entry.get("mtime_ns") == stat.st_mtime_ns and entry.get("size") == stat.st_size
+                and entry.get("name") in previous_plugins):
+            plugin_data_by_file[manifest_file] = previous_plugins[entry["name"]]
+        else:
+            stale_files.append(manifest_file)
+    
+    # Parse changed manifests in parallel
+    if stale_files:
+        with ProcessPoolExecutor() as pool:
+            manifests = pool.map(load_manifest, stale_files, chunksize=16)
+            for manifest_file, manifest in zip(stale_files, manifests):
+                if manifest:
+                    plugin_data_by_file[manifest_file] = extract_plugin_data(manifest)
+    
+    new_cache = {}
+    for manifest_file in manifest_files:
+        plugin_data = plugin_data_by_file.get(manifest_file)
+        if plugin_data is None:
+            continue
         
         plugins.append(plugin_data)
+        new_cache[manifest_file.name] = dict(file_stats[manifest_file.name], name=plugin_data.get("name"))
         
         # Build category index
-        for tag in manifest.get("tags", []):
-            categories[tag].append(manifest.get("name"))
+        for tag in plugin_data.get("tags", []):
+            categories[tag].append(plugin_data.get("name"))
+    
+    # Category keys are ordered by OPT_SORT_KEYS when writing
+    plugins.sort(key=lambda p: p.get("name", ""))
+    
+    # Leave the index untouched when no plugin data changed
+    content_hash = hashlib.sha256(
+        orjson.dumps(plugins, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    ).hexdigest()
+    if read_content_hash(output_file) == content_hash:
+        save_index_cache(cache_file, new_cache)
+        print(f"✓ Index is up to date ({len(plugins)} plugins)")
+        print(f"  Output: {output_file}")
+        return True
     
     # Create index structure
     index = {
         "version": "1.0.0",
-        "last_updated": datetime.utcnow().isoformat() + "Z",
+        "last_updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "content_hash": content_hash,
         "total_plugins": len(plugins),
-        "plugins": sorted(plugins, key=lambda p: p.get("name", "")),
-        "categories": dict(sorted(categories.items())),
+        "plugins": plugins,
+        "categories": categories,
     }
     
     # Write index file
     try:
-        with open(output_file, 'w') as f:
-            json.dump(index, f, indent=2, ensure_ascii=False)
+        output_file.write_bytes(orjson.dumps(
+            index,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+        ))
+        save_index_cache(cache_file, new_cache)
         print(f"✓ Generated index with {len(plugins)} plugins")
         print(f"  Categories: {len(categories)}")
         print(f"  Output: {output_file}")
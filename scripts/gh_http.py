@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+gh_http.py - Shared HTTP connection pool for GitHub API calls
+
+This module builds the urllib3 pool manager used by the verification
+scripts. The pool keeps keep-alive connections to api.github.com for all
+concurrent workers, retries transient failures, and carries the
+authentication headers so call sites only pass the URL.
+
+Requests made through resilient_get() and resilient_post() additionally wait
+out GitHub's primary and secondary rate limits instead of failing.
+"""
+
+import random
+import sys
+import time
+from typing import Dict, Optional
+
+from urllib3 import HTTPResponse, PoolManager, Retry
+
+# Pooled connections per host, enough for every concurrent worker
+POOL_SIZE = 32
+
+# Longest single wait for a rate limit to clear, in seconds
+MAX_RATE_LIMIT_WAIT = 60
+
+# Statuses GitHub uses to signal rate limiting or temporary unavailability
+RATE_LIMIT_STATUSES = {403, 429, 503}
+
+
+class RateLimitExhaustedError(Exception):
+    """Raised when the remaining GitHub API quota cannot cover the pending requests"""
+
+
+def create_http(token: str = "") -> PoolManager:
+    """Create a GitHub API pool manager with connection pooling and retries"""
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        # Rate limits (429/503) are handled by resilient_get()/resilient_post(),
+        # which cap the wait at MAX_RATE_LIMIT_WAIT
+        status_forcelist=[502, 504],
+        # GraphQL queries are sent as POST but are safe to repeat
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+
+    headers = {"Accept": "application/vnd.github+json"}
+    if token:
+        headers["Authorization"] = f"token {token}"
+    return PoolManager(num_pools=4, maxsize=POOL_SIZE, retries=retry, headers=headers)
+
+
+def _rate_limit_delay(response: HTTPResponse, attempt: int) -> float:
+    """Return how long to wait before retrying, or -1 if the response is not retryable"""
+    if response.status not in RATE_LIMIT_STATUSES:
+        return -1
+
+    retry_after = response.headers.get("Retry-After")
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    reset = response.headers.get("X-RateLimit-Reset")
+
+    # A plain 403 is a permission error, not a rate limit
+    if response.status == 403 and retry_after is None and remaining != "0":
+        return -1
+
+    if retry_after is not None and retry_after.isdigit():
+        delay = float(retry_after)
+    elif remaining == "0" and reset is not None and reset.isdigit():
+        delay = float(reset) - time.time()
+    else:
+        delay = 2 ** attempt
+
+    return min(max(delay, 0), MAX_RATE_LIMIT_WAIT) + random.uniform(0, 1)
+
+
+def _resilient_request(http: PoolManager, method: str, url: str, *,
+                       headers: Optional[Dict[str, str]] = None, max_retries: int = 5,
+                       **kwargs) -> HTTPResponse:
+    """Send a request, backing off while GitHub reports rate limiting"""
+    # Per-request headers replace the pool defaults in urllib3, so merge them
+    headers = {**http.headers, **(headers or {})}
+    for attempt in range(max_retries + 1):
+        response = http.request(method, url, headers=headers, **kwargs)
+        delay = _rate_limit_delay(response, attempt)
+        if delay < 0 or attempt == max_retries:
+            return response
+
+        remaining = response.headers.get("X-RateLimit-Remaining", "unknown")
+        print(
+            f"Warning: GitHub API rate limited (status {response.status}, "
+            f"{remaining} requests remaining), retrying in {delay:.1f}s",
+            file=sys.stderr,
+        )
+        time.sleep(delay)
+
+    return response
+
+
+def check_rate_limit(response: HTTPResponse, pending: int):
+    """Make sure the remaining quota covers the pending requests
+
+    Waits for the quota to reset when that is at most MAX_RATE_LIMIT_WAIT
+    seconds away, and raises RateLimitExhaustedError otherwise.
+    """
+    remaining = int(response.headers.get("X-RateLimit-Remaining", "5000"))
+    reset = int(response.headers.get("X-RateLimit-Reset", "0"))
+    if remaining >= pending:
+        return
+
+    wait = reset - time.time()
+    if wait <= MAX_RATE_LIMIT_WAIT:
+        print(
+            f"Warning: GitHub API quota too low ({remaining} remaining for {pending} requests), "
+            f"waiting {max(wait, 0):.0f}s for reset",
+            file=sys.stderr,
+        )
+        time.sleep(max(wait, 0))
+        return
+
+    reset_at = time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(reset))
+    raise RateLimitExhaustedError(
+        f"GitHub quota exhausted ({remaining} requests remaining for {pending} pending); "
+        f"retry after {reset_at}"
+    )
+
+
+def resilient_get(http: PoolManager, url: str, *, max_retries: int = 5,
+                  **kwargs) -> HTTPResponse:
+    """GET a GitHub API URL, retrying on rate limits"""
+    return _resilient_request(http, "GET", url, max_retries=max_retries, **kwargs)
+
+
+def resilient_post(http: PoolManager, url: str, *, max_retries: int = 5,
+                   **kwargs) -> HTTPResponse:
+    """POST to a GitHub API URL, retrying on rate limits"""
+    return _resilient_request(http, "POST", url, max_retries=max_retries, **kwargs)
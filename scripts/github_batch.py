@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+github_batch.py - Batched repository lookups through the GitHub GraphQL API
+
+This module resolves repository status (archived, disabled) and Potionfile
+presence for many repositories at once. Each GraphQL request covers up to
+BATCH_SIZE repositories through aliased `repository` fields, replacing one
+REST call per repository and per check. GraphQL requires authentication, so
+without a token each repository is resolved through the REST API instead.
+
+Results are cached in scripts/.ghcache.json together with the repository's
+REST ETag. Cached repositories are revalidated with a conditional request,
+and only repositories that changed since the last run are queried again.
+"""
+
+import itertools
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+from urllib3 import HTTPResponse, PoolManager
+from urllib3.exceptions import HTTPError
+
+from gh_http import check_rate_limit, resilient_get, resilient_post
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+REPOS_URL = "https://api.github.com/repos"
+
+CACHE_FILE = Path(__file__).parent / ".ghcache.json"
+
+# Repositories per GraphQL request, kept well below the node-cost limits
+BATCH_SIZE = 50
+
+# Number of concurrent GitHub API requests
+MAX_WORKERS = 16
+
+# (owner, name, potionfile_path)
+Target = Tuple[str, str, str]
+
+
+class GitHubBatchError(Exception):
+    """Raised when a batched GraphQL lookup fails as a whole"""
+
+
+def parse_repository_url(repo_url: str) -> Tuple[str, str]:
+    """Split a GitHub repository URL into (owner, name)"""
+    repo_path = repo_url.replace("https://github.com/", "").rstrip("/")
+    owner, _, name = repo_path.partition("/")
+    if not owner or not name or "/" in name:
+        raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
+    return owner, name
+
+
+def load_cache(cache_file: Path = CACHE_FILE) -> Dict[str, dict]:
+    """Load the repository metadata cache, starting empty if it is unusable"""
+    try:
+        with open(cache_file, "r") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache: Dict[str, dict], cache_file: Path = CACHE_FILE):
+    """Persist the repository metadata cache"""
+    try:
+        with open(cache_file, "w") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+    except OSError as e:
+        print(f"Warning: Failed to write {cache_file}: {e}", file=sys.stderr)
+
+
+def _cache_entry(cache: Dict[str, dict], target: Target) -> Optional[dict]:
+    """Return the cache entry for a target if it was resolved for the same Potionfile path"""
+    owner, name, potionfile_path = target
+    entry = cache.get(f"{owner}/{name}")
+    if entry and entry.get("etag") and entry.get("potionfile_path") == potionfile_path:
+        return entry
+    return None
+
+
+def _get_repository(http: PoolManager, target: Target,
+                    entry: Optional[dict]) -> HTTPResponse:
+    """Fetch repository metadata, conditionally when a cached ETag is available"""
+    owner, name, _ = target
+    headers = {"If-None-Match": entry["etag"]} if entry else {}
+    return resilient_get(http, f"{REPOS_URL}/{owner}/{name}", headers=headers, timeout=10)
+
+
+def _fetch_rest(http: PoolManager, target: Target,
+                response: HTTPResponse) -> Optional[dict]:
+    """Resolve a single target through the REST API, for unauthenticated runs
+
+    Failed lookups are reported per target through the `error` and
+    `potionfile_error` fields instead of raising.
+    """
+    owner, name, potionfile_path = target
+    if response.status != 200:
+        return {"error": f"Repository check failed (status {response.status})"}
+    repo = orjson.loads(response.data)
+
+    repo_data = {
+        "archived": repo.get("archived", False),
+        "disabled": repo.get("disabled", False),
+        "potionfile_oid": None,
+    }
+    try:
+        contents = resilient_get(
+            http, f"{REPOS_URL}/{owner}/{name}/contents/{potionfile_path.lstrip('/')}", timeout=10
+        )
+    except HTTPError as e:
+        repo_data["potionfile_error"] = f"Error checking Potionfile: {e}"
+        return repo_data
+
+    if contents.status == 200:
+        # Directories are listed as arrays and do not count as a Potionfile
+        blob = orjson.loads(contents.data)
+        repo_data["potionfile_oid"] = blob.get("sha") if isinstance(blob, dict) else None
+    elif contents.status != 404:
+        repo_data["potionfile_error"] = f"Failed to check Potionfile (status {contents.status})"
+
+    return repo_data
+
+
+def _build_query(batch: List[Target]) -> Tuple[str, Dict[str, str]]:
+    """Build an aliased GraphQL query and its variables for a batch of targets"""
+    params = []
+    fields = []
+    variables = {}
+
+    for i, (owner, name, potionfile_path) in enumerate(batch):
+        params.append(f"$owner{i}: String!, $name{i}: String!, $expr{i}: String!")
+        fields.append(
+            f"  repo{i}: repository(owner: $owner{i}, name: $name{i}) {{\n"
+            f"    isArchived\n"
+            f"    isDisabled\n"
+            f"    object(expression: $expr{i}) {{ ... on Blob {{ oid }} }}\n"
+            f"  }}"
+        )
+        variables[f"owner{i}"] = owner
+        variables[f"name{i}"] = name
+        variables[f"expr{i}"] = f"HEAD:{potionfile_path.lstrip('/')}"
+
+    query = f"query({', '.join(params)}) {{\n" + "\n".join(fields) + "\n}"
+    return query, variables
+
+
+def _fetch_batch(http: PoolManager, batch: List[Target]) -> Dict[Target, Optional[dict]]:
+    """Resolve a single batch of targets with one GraphQL request"""
+    query, variables = _build_query(batch)
+    response = resilient_post(
+        http,
+        GRAPHQL_URL,
+        body=orjson.dumps({"query": query, "variables": variables}),
+        headers={"Content-Type": "application/json"},
+        timeout=30,
+    )
+
+    if response.status != 200:
+        raise GitHubBatchError(f"GraphQL request failed (status {response.status})")
+
+    payload = orjson.loads(response.data)
+    data = payload.get("data")
+    if data is None:
+        messages = "; ".join(e.get("message", "") for e in payload.get("errors", []))
+        raise GitHubBatchError(f"GraphQL request failed: {messages}")
+
+    # Repositories that are missing or inaccessible resolve to null
+    results = {}
+    for i, target in enumerate(batch):
+        repo = data.get(f"repo{i}")
+        if repo is None:
+            results[target] = None
+            continue
+
+        blob = repo.get("object") or {}
+        results[target] = {
+            "archived": repo.get("isArchived", False),
+            "disabled": repo.get("isDisabled", False),
+            "potionfile_oid": blob.get("oid"),
+        }
+
+    return results
+
+
+def fetch_repositories(http: PoolManager, targets: List[Target],
+                       cache: Optional[Dict[str, dict]] = None) -> Dict[Target, Optional[dict]]:
+    """Resolve repository status and Potionfile presence for all targets
+
+    Returns a dict keyed by target. Each value is None when the repository
+    does not exist or is not accessible, otherwise a dict with `archived`,
+    `disabled`, and `potionfile_oid` (None when no Potionfile blob exists at
+    the requested path).
+
+    When a cache dict is given, repositories whose ETag still matches are
+    served from it and the cache is updated in place with fresh results.
+
+    Without an Authorization header on the pool, repositories are resolved
+    through the REST API, one contents request per repository. A repository
+    that cannot be checked then carries an `error` message instead of the
+    other fields, and a Potionfile that cannot be checked a `potionfile_error`.
+    """
+    authenticated = bool(http.headers.get("Authorization"))
+    if cache is None:
+        cache = {}
+
+    unique_targets = list(dict.fromkeys(targets))
+    entries = [_cache_entry(cache, target) for target in unique_targets]
+
+    results = {}
+    pending = []
+    repo_responses = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Revalidate repository metadata; 304 responses do not count against the rate limit.
+        # The first request goes out alone so the quota can be checked before the rest.
+        responses = []
+        if unique_targets:
+            first = _get_repository(http, unique_targets[0], entries[0])
+            # Unauthenticated runs also need a contents request per repository
+            requests_per_target = 1 if authenticated else 2
+            check_rate_limit(first, len(unique_targets) * requests_per_target - 1)
+            responses = itertools.chain([first], executor.map(
+                lambda item: _get_repository(http, item[0], item[1]),
+                zip(unique_targets[1:], entries[1:]),
+            ))
+
+        for target, entry, response in zip(unique_targets, entries, responses):
+            repo_path = f"{target[0]}/{target[1]}"
+            if response.status == 304 and entry:
+                results[target] = {
+                    "archived": entry["archived"],
+                    "disabled": entry["disabled"],
+                    "potionfile_oid": entry["potionfile_oid"],
+                }
+                continue
+
+            if response.status == 404:
+                cache.pop(repo_path, None)
+                results[target] = None
+                continue
+
+            if response.status == 200:
+                cache[repo_path] = {"etag": response.headers.get("ETag")}
+            pending.append(target)
+            repo_responses[target] = response
+
+        if authenticated:
+            # Resolve new or changed repositories through GraphQL
+            batches = [pending[i:i + BATCH_SIZE] for i in range(0, len(pending), BATCH_SIZE)]
+            fetched = itertools.chain.from_iterable(
+                batch_results.items()
+                for batch_results in executor.map(lambda batch: _fetch_batch(http, batch), batches)
+            )
+        else:
+            fetched = zip(pending, executor.map(
+                lambda target: _fetch_rest(http, target, repo_responses[target]), pending
+            ))
+
+        for target, repo_data in fetched:
+            results[target] = repo_data
+
+            repo_path = f"{target[0]}/{target[1]}"
+            entry = cache.get(repo_path)
+            if repo_data is None or "error" in repo_data or "potionfile_error" in repo_data:
+                cache.pop(repo_path, None)
+            elif entry is not None:
+                entry.update(repo_data, potionfile_path=target[2])
+
+    return results
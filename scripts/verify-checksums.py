@@ -7,9 +7,113 @@ format (sha256: prefix with 64 hex characters). Missing checksums generate
 warnings but do not cause failures.
 """
 
+import mmap
+import os
+import re
 import sys
 import yaml
 from pathlib import Path
+from typing import Optional, Tuple
+
+from _changed_files import changed_manifest_paths
+
+try:
+    from yaml import CSafeLoader
+except ImportError:
+    from yaml import SafeLoader as CSafeLoader
+
+# Top-level `checksum:` / `repository:` lines and the raw value after the key
+_CHECKSUM_RE = re.compile(rb'^checksum[ \t]*:(?:[ \t]+([^\r\n]*))?\r?$', re.MULTILINE)
+_REPOSITORY_RE = re.compile(rb'^repository[ \t]*:(?:[ \t]+([^\r\n]*))?\r?$', re.MULTILINE)
+
+# Constructs the scan cannot follow: document markers, directives, top-level
+# sequences, and quoted, complex, anchored or tagged keys (which may repeat a
+# key in another spelling)
+_UNSUPPORTED_RE = re.compile(rb'^(?:---|\.\.\.|-(?:[ \t]|\r?$)|[%"\':?&!*{\[])', re.MULTILINE)
+
+# Quoted or flow values of any top-level key, which may run over several lines
+_OPEN_VALUE_RE = re.compile(rb'^[^\s#][^\r\n]*?:[ \t]+(["\'\[{][^\r\n]*?)\r?$', re.MULTILINE)
+_CLOSED_VALUE_RE = re.compile(
+    r'(?:"((?:[^"\\]|\\.)*)"|\'((?:[^\']|\'\')*)\'|\[[^\]]*\]|\{[^}]*\})(?:[ \t]+#.*|[ \t]*)'
+)
+
+# Indented lines after a top-level value continue it
+_CONTINUATION_RE = re.compile(rb'(?:[ \t]*\r?\n)*[ \t]+\S')
+
+# A single-line plain scalar, optionally followed by a comment
+_PLAIN_VALUE_RE = re.compile(r'([^\s#"\'>|&*!%@`{}\[\],?:-]\S*?)(?:[ \t]+#.*)?')
+
+_RESOLVER = yaml.resolver.Resolver()
+_STR_TAG = "tag:yaml.org,2002:str"
+
+
+def _scalar_value(value: bytes) -> Optional[str]:
+    """Return a scanned value as YAML would load it, or None if unsure
+
+    Only single-line quoted strings and plain scalars that resolve to
+    strings (not null, booleans or numbers) are read directly.
+    """
+    text = value.decode("utf-8", "replace").rstrip()
+    quoted = _CLOSED_VALUE_RE.fullmatch(text)
+    if quoted:
+        if quoted.group(1) is not None and "\\" not in quoted.group(1):
+            return quoted.group(1)
+        if quoted.group(2) is not None:
+            return quoted.group(2).replace("''", "'")
+        return None
+
+    plain = _PLAIN_VALUE_RE.fullmatch(text)
+    if not plain or plain.group(1).endswith(":"):
+        return None
+    scalar = plain.group(1)
+    if _RESOLVER.resolve(yaml.nodes.ScalarNode, scalar, (True, False)) != _STR_TAG:
+        return None
+    return scalar
+
+
+def _scan_key(mm: mmap.mmap, pattern: re.Pattern) -> Optional[str]:
+    """Return the value of a top-level key, "" when absent, or None if unsure"""
+    matches = list(pattern.finditer(mm))
+    if not matches:
+        return ""
+    # YAML keeps the last of duplicate keys; leave those to the parser
+    if len(matches) > 1 or matches[0].group(1) is None:
+        return None
+
+    if _CONTINUATION_RE.match(mm, matches[0].end()):
+        return None
+
+    return _scalar_value(matches[0].group(1))
+
+
+def scan_manifest(manifest_path: Path) -> Tuple[str, str]:
+    """Extract (checksum, repository) from a manifest without a full YAML parse
+
+    Falls back to a full YAML load whenever the scan cannot be sure it reads
+    the same values a YAML parser would.
+    """
+    checksum = repo_url = None
+
+    with open(manifest_path, "rb") as f:
+        # Empty files cannot be mapped
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if not _UNSUPPORTED_RE.search(mm) and all(
+                    _CLOSED_VALUE_RE.fullmatch(value.decode("utf-8", "replace").rstrip())
+                    for value in _OPEN_VALUE_RE.findall(mm)
+                ):
+                    checksum = _scan_key(mm, _CHECKSUM_RE)
+                    repo_url = _scan_key(mm, _REPOSITORY_RE)
+
+    # Fall back to YAML for anything the scan cannot read as-is (block scalars,
+    # anchors, aliases, tags, null values, duplicate keys, multi-line values)
+    if not (checksum and checksum.startswith("sha256:") and repo_url):
+        with open(manifest_path, "r") as mf:
+            manifest = yaml.load(mf, Loader=CSafeLoader)
+        checksum = manifest.get("checksum", "")
+        repo_url = manifest.get("repository", "")
+
+    return checksum, repo_url
 
 
 def verify_checksums(changed_files_path: str) -> bool:
@@ -22,44 +126,35 @@ def verify_checksums(changed_files_path: str) -> bool:
         print(f"Error: Changed files list not found: {changed_files_path}", file=sys.stderr)
         return False
 
-    with open(changed_files, "r") as f:
-        for line in f:
-            file_path = line.strip()
-            if not file_path:
-                continue
-
-            try:
-                manifest_path = Path(file_path)
-                if not manifest_path.exists():
-                    continue
-
-                with open(manifest_path, "r") as mf:
-                    manifest = yaml.safe_load(mf)
-
-                checksum = manifest.get("checksum", "")
-                repo_url = manifest.get("repository", "")
+    for file_path in changed_manifest_paths(changed_files_path):
+        try:
+            checksum, repo_url = scan_manifest(file_path)
 
-                if not checksum:
-                    warnings.append(f"{file_path}: No checksum provided (recommended for security)")
-                    continue
+            if not checksum:
+                warnings.append(f"{file_path}: No checksum provided (recommended for security)")
+                continue
 
-                if not repo_url:
-                    continue
+            if not repo_url:
+                continue
 
-                # Extract expected checksum
-                if not checksum.startswith("sha256:"):
-                    errors.append(f"{file_path}: Invalid checksum format (must start with 'sha256:')")
-                    continue
+            # Extract expected checksum
+            if not checksum.startswith("sha256:"):
+                errors.append(f"{file_path}: Invalid checksum format (must start with 'sha256:')")
+                continue
 
-                expected_hash = checksum.replace("sha256:", "")
+            expected_hash = checksum.replace("sha256:", "")
 
-                # Note: Full checksum verification would require downloading the plugin
-                # This is a placeholder that validates the format
-                if len(expected_hash) != 64:
+            # Note: Full checksum verification would require downloading the plugin
+            # This is a placeholder that validates the format
+            # bytes.fromhex skips whitespace, so the digest length is checked too
+            try:
+                if len(expected_hash) != 64 or len(bytes.fromhex(expected_hash)) != 32:
                     errors.append(f"{file_path}: Invalid SHA256 checksum length")
+            except ValueError:
+                errors.append(f"{file_path}: Checksum is not valid hex")
 
-            except Exception as e:
-                errors.append(f"{file_path}: Error verifying checksum: {e}")
+        except Exception as e:
+            errors.append(f"{file_path}: Error verifying checksum: {e}")
 
     if warnings:
         print("Checksum warnings:", file=sys.stderr)
@@ -8,65 +8,71 @@ are accessible, not archived, and not disabled.
 
 import os
 import sys
-import yaml
-import requests
 from pathlib import Path
 
+from _changed_files import iter_manifests
+from gh_http import create_http
+from github_batch import fetch_repositories, load_cache, parse_repository_url, save_cache
+
 
 def verify_repository_accessibility(changed_files_path: str) -> bool:
     """Verify all repositories in changed manifest files"""
     GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
 
     errors = []
+    targets = []
     
     changed_files = Path(changed_files_path)
     if not changed_files.exists():
         print(f"Error: Changed files list not found: {changed_files_path}", file=sys.stderr)
         return False
 
-    with open(changed_files, "r") as f:
-        for line in f:
-            file_path = line.strip()
-            if not file_path:
-                continue
+    def report_error(file_path: Path, e: Exception):
+        errors.append(f"{file_path}: Error checking repository: {e}")
 
-            try:
-                manifest_path = Path(file_path)
-                if not manifest_path.exists():
-                    continue
+    # Collect repositories to check from the changed manifests
+    for file_path, manifest in iter_manifests(changed_files_path, report_error):
+        try:
+            repo_url = manifest.get("repository", "")
+            potionfile_path = manifest.get("potionfile_path", "Potionfile")
 
-                with open(manifest_path, "r") as mf:
-                    manifest = yaml.safe_load(mf)
+            if not repo_url:
+                continue
 
-                repo_url = manifest.get("repository", "")
-                if not repo_url:
+            owner, name = parse_repository_url(repo_url)
+            targets.append((file_path, repo_url, (owner, name, potionfile_path)))
+
+        except Exception as e:
+            errors.append(f"{file_path}: Error checking repository: {e}")
+
+    # Look up all repositories in batched GraphQL requests
+    if targets:
+        cache = load_cache()
+        try:
+            with create_http(GITHUB_TOKEN) as http:
+                repositories = fetch_repositories(http, [target for _, _, target in targets], cache)
+        except Exception as e:
+            errors.append(f"Error checking repositories: {e}")
+        else:
+            for file_path, repo_url, target in targets:
+                repo_data = repositories[target]
+                if repo_data is None:
+                    errors.append(f"{file_path}: Repository not found: {repo_url}")
+                    continue
+                if "error" in repo_data:
+                    errors.append(f"{file_path}: {repo_data['error']}: {repo_url}")
                     continue
 
-                # Extract repo path
-                repo_path = repo_url.replace("https://github.com/", "").rstrip("/")
-
-                # Check repository exists and is accessible
-                api_url = f"https://api.github.com/repos/{repo_path}"
-                response = requests.get(api_url, headers=headers, timeout=10)
-
-                if response.status_code == 404:
-                    errors.append(f"{file_path}: Repository not found: {repo_url}")
-                elif response.status_code != 200:
-                    errors.append(f"{file_path}: Repository check failed (status {response.status_code}): {repo_url}")
-                else:
-                    repo_data = response.json()
-                    if repo_data.get("archived", False):
-                        errors.append(f"{file_path}: Repository is archived: {repo_url}")
-                    if repo_data.get("disabled", False):
-                        errors.append(f"{file_path}: Repository is disabled: {repo_url}")
-
-            except Exception as e:
-                errors.append(f"{file_path}: Error checking repository: {e}")
+                if repo_data["archived"]:
+                    errors.append(f"{file_path}: Repository is archived: {repo_url}")
+                if repo_data["disabled"]:
+                    errors.append(f"{file_path}: Repository is disabled: {repo_url}")
+        finally:
+            save_cache(cache)
 
     if errors:
         print("Repository verification errors:", file=sys.stderr)
-        for error in errors:
+        for error in sorted(errors):
             print(f"  - {error}", file=sys.stderr)
         return False
 
@@ -84,4 +90,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-